@@ -2,6 +2,7 @@
 // Si quieres silenciar cualquier chequeo TS en .js, descomenta:
 // // @ts-nocheck
 
+import { createHash } from 'crypto'
 import { createClient } from '@supabase/supabase-js'
 import { NextResponse } from 'next/server'
 import { v4 as uuidv4 } from 'uuid'
@@ -227,15 +228,238 @@ async function inicializarDatos() {
   }
 }
 
+// ===== Índice precalculado de próximos eventos =====
+// GET /api/eventos devuelve todo el histórico. /api/eventos/proximos y el feed
+// /api/eventos/calendario.ics se sirven desde este índice en memoria, con las
+// respuestas ya serializadas (agrupadas por mes y tipo) y su ETag.
+// Se invalida al crear/editar/borrar eventos y caduca a medianoche UTC (cuando los
+// eventos de ayer dejan de ser próximos) o tras INDICE_EVENTOS_TTL_MS, para recoger
+// cambios hechos desde otras instancias.
+const INDICE_EVENTOS_TTL_MS = 60 * 1000
+const CACHE_CONTROL_EVENTOS = `public, max-age=${INDICE_EVENTOS_TTL_MS / 1000}, stale-while-revalidate=300`
+const MES_REGEX = /^\d{4}-(0[1-9]|1[0-2])$/
+const FECHA_SIN_HORA_REGEX = /^\d{4}-\d{2}-\d{2}$/
+// Sin '|', no choca con ninguna clave mes|tipo
+const CLAVE_VACIO = 'vacio'
+
+let indiceEventos = null
+let indiceEventosPendiente = null
+let versionEventos = 0
+
+// El índice caducado se conserva como referencia para mantener el Last-Modified de
+// los grupos cuyo contenido no cambió
+function invalidarIndiceEventos() {
+  versionEventos++
+  if (indiceEventos) indiceEventos.expira = 0
+  indiceEventosPendiente = null
+}
+
+function claveGrupo(mes, tipo) {
+  return `${mes}|${tipo}`
+}
+
+function representacion(cuerpo, clave, anteriores, generado) {
+  const etag = `"${createHash('sha1').update(cuerpo).digest('base64url')}"`
+  // Si el contenido no cambió desde el índice anterior, conservo su Last-Modified
+  const anterior = anteriores?.get(clave)
+  const modificado = anterior?.etag === etag ? anterior.modificado : generado
+  return { cuerpo, etag, modificado }
+}
+
+function escaparTextoICS(valor) {
+  return String(valor ?? '')
+    .replace(/\\/g, '\\\\')
+    .replace(/;/g, '\\;')
+    .replace(/,/g, '\\,')
+    .replace(/\r?\n/g, '\\n')
+}
+
+// RFC 5545: líneas de máximo 75 octetos, continuadas con CRLF + espacio
+function plegarLineaICS(linea) {
+  const partes = []
+  let actual = ''
+  let octetos = 0
+  for (const caracter of linea) {
+    const tamano = Buffer.byteLength(caracter)
+    if (octetos + tamano > 75) {
+      partes.push(actual)
+      actual = ' '
+      octetos = 1
+    }
+    actual += caracter
+    octetos += tamano
+  }
+  partes.push(actual)
+  return partes.join('\r\n')
+}
+
+function fechaICS(fecha) {
+  return fecha.toISOString().replace(/[-:]/g, '').replace(/\.\d{3}/, '')
+}
+
+function construirCalendarioICS(eventos) {
+  const lineas = [
+    'BEGIN:VCALENDAR',
+    'VERSION:2.0',
+    'PRODID:-//AIPMA//Eventos//ES',
+    'CALSCALE:GREGORIAN',
+    'METHOD:PUBLISH',
+    'X-WR-CALNAME:AIPMA - Próximos eventos',
+    'REFRESH-INTERVAL;VALUE=DURATION:PT1H',
+    'X-PUBLISHED-TTL:PT1H'
+  ]
+  for (const evento of eventos) {
+    const inicio = new Date(evento.fecha)
+    // Sin DTSTAMP derivado del evento el ETag cambiaría en cada reconstrucción
+    const sello = new Date(evento.fechaActualizacion || evento.fechaCreacion || evento.fecha)
+    if (Number.isNaN(sello.getTime())) sello.setTime(inicio.getTime())
+    // Sólo una fecha sin hora (columna date) es un evento de día completo; un timestamp a
+    // las 00:00Z puede ser, p. ej., las 18:00 del día anterior en UTC-6
+    const esDiaCompleto = typeof evento.fecha === 'string' && FECHA_SIN_HORA_REGEX.test(evento.fecha)
+    lineas.push(
+      'BEGIN:VEVENT',
+      `UID:${evento.id}@aipma`,
+      `DTSTAMP:${fechaICS(sello)}`,
+      esDiaCompleto ? `DTSTART;VALUE=DATE:${evento.fecha.replace(/-/g, '')}` : `DTSTART:${fechaICS(inicio)}`,
+      `SUMMARY:${escaparTextoICS(evento.titulo)}`
+    )
+    if (evento.descripcion) lineas.push(`DESCRIPTION:${escaparTextoICS(evento.descripcion)}`)
+    if (evento.ubicacion) lineas.push(`LOCATION:${escaparTextoICS(evento.ubicacion)}`)
+    if (evento.tipo) lineas.push(`CATEGORIES:${escaparTextoICS(evento.tipo)}`)
+    lineas.push('END:VEVENT')
+  }
+  lineas.push('END:VCALENDAR')
+  return lineas.map(plegarLineaICS).join('\r\n') + '\r\n'
+}
+
+async function construirIndiceEventos(database, anterior) {
+  await inicializarDatos()
+  const eventos = await database.collection('eventos').find({}).sort({ fecha: 1 }).toArray()
+
+  const ahora = new Date()
+  const hoy = Date.UTC(ahora.getUTCFullYear(), ahora.getUTCMonth(), ahora.getUTCDate())
+  const manana = hoy + 24 * 60 * 60 * 1000
+  // Last-Modified tiene resolución de segundos
+  const generado = new Date(Math.floor(ahora.getTime() / 1000) * 1000)
+
+  const grupos = new Map([[claveGrupo('', ''), []]])
+  const agregar = (clave, evento) => {
+    if (!grupos.has(clave)) grupos.set(clave, [])
+    grupos.get(clave).push(evento)
+  }
+  for (const evento of eventos) {
+    const fecha = new Date(evento.fecha)
+    if (Number.isNaN(fecha.getTime()) || fecha.getTime() < hoy) continue
+    const mes = fecha.toISOString().slice(0, 7)
+    const tipo = String(evento.tipo ?? '').toLowerCase()
+    agregar(claveGrupo('', ''), evento)
+    agregar(claveGrupo(mes, ''), evento)
+    if (tipo) {
+      agregar(claveGrupo('', tipo), evento)
+      agregar(claveGrupo(mes, tipo), evento)
+    }
+  }
+
+  const json = new Map()
+  const ics = new Map()
+  grupos.set(CLAVE_VACIO, [])
+  for (const [clave, grupo] of grupos) {
+    json.set(clave, representacion(JSON.stringify({ eventos: grupo }), clave, anterior?.json, generado))
+    // El feed sólo se filtra por tipo
+    if (clave.startsWith('|') || clave === CLAVE_VACIO) {
+      ics.set(clave, representacion(construirCalendarioICS(grupo), clave, anterior?.ics, generado))
+    }
+  }
+
+  return {
+    json,
+    ics,
+    expira: Math.min(manana, ahora.getTime() + INDICE_EVENTOS_TTL_MS)
+  }
+}
+
+async function obtenerIndiceEventos(database) {
+  if (indiceEventos && Date.now() < indiceEventos.expira) return indiceEventos
+
+  // Una sola reconstrucción en curso; si se invalida mientras tanto, su resultado no se guarda
+  if (!indiceEventosPendiente) {
+    const version = versionEventos
+    const pendiente = construirIndiceEventos(database, indiceEventos)
+      .then((indice) => {
+        if (version === versionEventos) indiceEventos = indice
+        return indice
+      })
+      .finally(() => {
+        if (indiceEventosPendiente === pendiente) indiceEventosPendiente = null
+      })
+    indiceEventosPendiente = pendiente
+  }
+  return indiceEventosPendiente
+}
+
+function noModificado(request, { etag, modificado }) {
+  const ifNoneMatch = request.headers.get('if-none-match')
+  if (ifNoneMatch) {
+    return ifNoneMatch.split(',').some((valor) => {
+      const candidato = valor.trim()
+      return candidato === '*' || candidato.replace(/^W\//, '') === etag
+    })
+  }
+  const ifModifiedSince = request.headers.get('if-modified-since')
+  if (ifModifiedSince) {
+    const desde = Date.parse(ifModifiedSince)
+    return !Number.isNaN(desde) && modificado.getTime() <= desde
+  }
+  return false
+}
+
+function responderCacheable(request, rep, headersContenido) {
+  const headers = {
+    'Cache-Control': CACHE_CONTROL_EVENTOS,
+    ETag: rep.etag,
+    'Last-Modified': rep.modificado.toUTCString()
+  }
+  if (noModificado(request, rep)) {
+    return new NextResponse(null, { status: 304, headers })
+  }
+  return new NextResponse(rep.cuerpo, { status: 200, headers: { ...headers, ...headersContenido } })
+}
+
+async function servirIndiceEventos(request, database, pathname, params) {
+  const tipo = (params.get('tipo') || '').toLowerCase()
+
+  if (pathname === 'eventos/calendario.ics') {
+    const indice = await obtenerIndiceEventos(database)
+    const rep = indice.ics.get(claveGrupo('', tipo)) ?? indice.ics.get(CLAVE_VACIO)
+    return responderCacheable(request, rep, {
+      'Content-Type': 'text/calendar; charset=utf-8',
+      'Content-Disposition': 'inline; filename="aipma-eventos.ics"'
+    })
+  }
+
+  const mes = params.get('mes') || ''
+  if (mes && !MES_REGEX.test(mes)) {
+    return NextResponse.json({ error: 'Parámetro mes inválido (formato AAAA-MM)' }, { status: 400 })
+  }
+  const indice = await obtenerIndiceEventos(database)
+  const rep = indice.json.get(claveGrupo(mes, tipo)) ?? indice.json.get(CLAVE_VACIO)
+  return responderCacheable(request, rep, { 'Content-Type': 'application/json' })
+}
+
 // ===== Handlers =====
 export async function GET(request) {
   try {
     const database = await connectDB()
-    await inicializarDatos()
-
     const url = new URL(request.url)
     const pathname = url.pathname.replace('/api/', '')
 
+    // Rutas servidas desde el índice: no tocan Supabase mientras el índice esté vigente
+    if (pathname === 'eventos/proximos' || pathname === 'eventos/calendario.ics') {
+      return await servirIndiceEventos(request, database, pathname, url.searchParams)
+    }
+
+    await inicializarDatos()
+
     switch (pathname) {
       case 'noticias': {
         const noticias = await database.collection('noticias').find({}).sort({ fecha: -1 }).toArray()
@@ -252,7 +476,14 @@ export async function GET(request) {
       default:
         return NextResponse.json({
           message: 'API de AIPMA funcionando correctamente',
-          endpoints: ['/api/noticias', '/api/eventos', '/api/miembros', '/api/contacto']
+          endpoints: [
+            '/api/noticias',
+            '/api/eventos',
+            '/api/eventos/proximos',
+            '/api/eventos/calendario.ics',
+            '/api/miembros',
+            '/api/contacto'
+          ]
         })
     }
   } catch (error) {
@@ -307,6 +538,7 @@ export async function POST(request) {
           fechaCreacion: new Date()
         }
         await database.collection('eventos').insertOne(nuevoEvento)
+        invalidarIndiceEventos()
         return NextResponse.json({ success: true, evento: nuevoEvento })
       }
       case 'miembros': {
@@ -353,6 +585,7 @@ export async function PUT(request) {
     if (result.matchedCount === 0) {
       return NextResponse.json({ error: 'Elemento no encontrado' }, { status: 404 })
     }
+    if (collection === 'eventos') invalidarIndiceEventos()
     return NextResponse.json({ success: true, message: 'Elemento actualizado exitosamente' })
   } catch (error) {
     console.error('Error en PUT (Supabase):', error)
@@ -378,6 +611,7 @@ export async function DELETE(request) {
     if (result.deletedCount === 0) {
       return NextResponse.json({ error: 'Elemento no encontrado' }, { status: 404 })
     }
+    if (collection === 'eventos') invalidarIndiceEventos()
     return NextResponse.json({ success: true, message: 'Elemento eliminado exitosamente' })
   } catch (error) {
     console.error('Error en DELETE (Supabase):', error)
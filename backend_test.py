@@ -7,9 +7,22 @@ Tests all backend endpoints for the Alianza Internacional de Periodismo y Medios
 import requests
 import json
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import sys
 import os
+import argparse
+import asyncio
+import http.client
+import itertools
+import math
+import multiprocessing
+import shutil
+import socket
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
 
 # Get the base URL from environment - using localhost for testing
 BASE_URL = "http://localhost:3000"
@@ -20,6 +33,9 @@ class AIpmaAPITester:
         self.test_results = []
         self.failed_tests = []
         self.passed_tests = []
+        # Set by test_post_eventos, checked by test_get_eventos_proximos (index refresh)
+        self.created_event_id = None
+        self.proximos_etag_before_post = None
         
     def log_result(self, test_name, success, message, details=None):
         """Log test results"""
@@ -52,7 +68,7 @@ class AIpmaAPITester:
                 # Check if response contains expected fields
                 if 'message' in data and 'endpoints' in data:
                     # Verify endpoints list
-                    expected_endpoints = ['/api/noticias', '/api/eventos', '/api/miembros', '/api/contacto']
+                    expected_endpoints = ['/api/noticias', '/api/eventos', '/api/eventos/proximos', '/api/eventos/calendario.ics', '/api/miembros', '/api/contacto']
                     actual_endpoints = data['endpoints']
                     
                     missing_endpoints = [ep for ep in expected_endpoints if ep not in actual_endpoints]
@@ -249,6 +265,123 @@ class AIpmaAPITester:
         except Exception as e:
             self.log_result("GET Eventos", False, f"Request failed: {str(e)}")
     
+    def test_get_eventos_proximos(self):
+        """Test GET /api/eventos/proximos - Upcoming events from the precomputed index"""
+        try:
+            response = requests.get(f"{API_BASE}/eventos/proximos", timeout=10)
+            
+            if response.status_code != 200:
+                self.log_result("GET Eventos Proximos", False, f"HTTP {response.status_code}", response.text)
+                return
+            
+            eventos = response.json().get('eventos')
+            if not isinstance(eventos, list):
+                self.log_result(
+                    "GET Eventos Proximos", 
+                    False, 
+                    "Invalid response structure",
+                    f"Expected 'eventos' array, got: {type(eventos)}"
+                )
+                return
+            
+            today = datetime.now(timezone.utc).date()
+            # Plain dates (no time) parse as naive; treat them as UTC like the server does
+            dates = [datetime.fromisoformat(e['fecha'].replace('Z', '+00:00')) for e in eventos]
+            dates = [d if d.tzinfo else d.replace(tzinfo=timezone.utc) for d in dates]
+            issues = []
+            if any(d.date() < today for d in dates):
+                issues.append("Past events included")
+            if dates != sorted(dates):
+                issues.append("Events not sorted by fecha ascending")
+            if not response.headers.get('ETag') or 'max-age' not in response.headers.get('Cache-Control', ''):
+                issues.append("Missing ETag / Cache-Control headers")
+            
+            # Conditional request must be answered with 304 and no body
+            conditional = requests.get(
+                f"{API_BASE}/eventos/proximos",
+                headers={'If-None-Match': response.headers.get('ETag', '')},
+                timeout=10
+            )
+            if conditional.status_code != 304:
+                issues.append(f"Conditional request returned HTTP {conditional.status_code}")
+            
+            # Filters by tipo and month come from the same index
+            typed_event = next((e for e in eventos if e.get('tipo')), None)
+            if typed_event:
+                mes = typed_event['fecha'][:7]
+                tipo = typed_event['tipo'].lower()
+                filtered = requests.get(
+                    f"{API_BASE}/eventos/proximos",
+                    params={'mes': mes, 'tipo': tipo},
+                    timeout=10
+                ).json().get('eventos', [])
+                if typed_event['id'] not in [e['id'] for e in filtered] or \
+                        any(e['fecha'][:7] != mes or (e.get('tipo') or '').lower() != tipo for e in filtered):
+                    issues.append("mes/tipo filter returned unexpected events")
+            
+            # The index must refresh when eventos change (test_post_eventos runs just before)
+            if self.created_event_id:
+                if self.created_event_id not in [e['id'] for e in eventos]:
+                    issues.append("Event created by POST /api/eventos missing from the index")
+                if response.headers.get('ETag') == self.proximos_etag_before_post:
+                    issues.append("ETag unchanged after POST /api/eventos")
+            
+            invalid = requests.get(f"{API_BASE}/eventos/proximos", params={'mes': '2024-13'}, timeout=10)
+            if invalid.status_code != 400:
+                issues.append(f"Invalid mes returned HTTP {invalid.status_code}")
+            
+            if not issues:
+                self.log_result(
+                    "GET Eventos Proximos", 
+                    True, 
+                    f"Retrieved {len(eventos)} upcoming events sorted by date, with cache headers and 304 support",
+                    f"ETag: {response.headers.get('ETag')}"
+                )
+            else:
+                self.log_result("GET Eventos Proximos", False, f"Validation issues: {', '.join(issues)}")
+                
+        except Exception as e:
+            self.log_result("GET Eventos Proximos", False, f"Request failed: {str(e)}")
+    
+    def test_get_eventos_calendario(self):
+        """Test GET /api/eventos/calendario.ics - iCalendar feed of upcoming events"""
+        try:
+            response = requests.get(f"{API_BASE}/eventos/calendario.ics", timeout=10)
+            
+            if response.status_code != 200:
+                self.log_result("GET Eventos Calendario", False, f"HTTP {response.status_code}", response.text)
+                return
+            
+            body = response.text
+            issues = []
+            if not response.headers.get('Content-Type', '').startswith('text/calendar'):
+                issues.append(f"Unexpected Content-Type: {response.headers.get('Content-Type')}")
+            if not body.startswith('BEGIN:VCALENDAR\r\n') or not body.rstrip().endswith('END:VCALENDAR'):
+                issues.append("Body is not a VCALENDAR")
+            if body.count('BEGIN:VEVENT') != body.count('END:VEVENT'):
+                issues.append("Unbalanced VEVENT blocks")
+            
+            conditional = requests.get(
+                f"{API_BASE}/eventos/calendario.ics",
+                headers={'If-None-Match': response.headers.get('ETag', '')},
+                timeout=10
+            )
+            if conditional.status_code != 304:
+                issues.append(f"Conditional request returned HTTP {conditional.status_code}")
+            
+            if not issues:
+                self.log_result(
+                    "GET Eventos Calendario", 
+                    True, 
+                    f"iCalendar feed with {body.count('BEGIN:VEVENT')} events and 304 support",
+                    f"ETag: {response.headers.get('ETag')}, Cache-Control: {response.headers.get('Cache-Control')}"
+                )
+            else:
+                self.log_result("GET Eventos Calendario", False, f"Validation issues: {', '.join(issues)}")
+                
+        except Exception as e:
+            self.log_result("GET Eventos Calendario", False, f"Request failed: {str(e)}")
+    
     def test_get_miembros(self):
         """Test GET /api/miembros - Get members"""
         try:
@@ -461,6 +594,10 @@ class AIpmaAPITester:
                 "capacidad": 80
             }
             
+            # Remember the upcoming-events index version to check it refreshes after the POST
+            before = requests.get(f"{API_BASE}/eventos/proximos", timeout=10)
+            self.proximos_etag_before_post = before.headers.get('ETag')
+            
             response = requests.post(
                 f"{API_BASE}/eventos", 
                 json=test_data,
@@ -473,6 +610,7 @@ class AIpmaAPITester:
                 
                 if data.get('success') and 'evento' in data:
                     created_event = data['evento']
+                    self.created_event_id = created_event.get('id')
                     
                     # Verify UUID format
                     try:
@@ -667,6 +805,8 @@ class AIpmaAPITester:
         self.test_post_contacto()
         self.test_post_noticias()
         self.test_post_eventos()
+        self.test_get_eventos_proximos()
+        self.test_get_eventos_calendario()
         self.test_post_miembros()
         self.test_error_handling()
         
@@ -690,9 +830,624 @@ class AIpmaAPITester:
         
         return len(self.failed_tests) == 0
 
+
+# ===== Multi-core scaling benchmark =====
+#
+# The standalone Next.js server runs on a single Node event loop, so we scale
+# by adding instances. The benchmark below starts 1, 2, 4, ... instances of the
+# built app behind a local round-robin proxy, points them at a local stand-in
+# for the Supabase REST API, drives each setup to saturation and reports
+# throughput per core and scaling efficiency.
+
+# Heaviest stand-in call made by the API route, used to calibrate the harness
+STANDIN_CALIBRATION_PATH = "/rest/v1/eventos?select=*&order=fecha.asc"
+STANDALONE_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".next", "standalone", "server.js")
+
+
+def _free_port():
+    """Reserve an ephemeral localhost port for a child server"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, path="/", timeout=60.0, process=None):
+    """Poll until an HTTP server answers on the given port"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            return False
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", path)
+            conn.getresponse().read()
+            conn.close()
+            return True
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.2)
+    return False
+
+
+def build_standin_tables(eventos_count=120):
+    """Build the rows served by the backend stand-in, shaped like the Supabase tables"""
+    now = datetime.now()
+    tipos = ["conferencia", "taller", "simposio", "webinar"]
+    eventos = []
+    for i in range(eventos_count):
+        eventos.append({
+            "id": str(uuid.uuid4()),
+            "titulo": f"Evento de Periodismo {i + 1}",
+            "descripcion": "Encuentro internacional sobre periodismo, verificación de hechos y medios audiovisuales.",
+            "fecha": (now + timedelta(days=(i - eventos_count // 2) * 3)).isoformat(),
+            "ubicacion": "Online" if i % 3 == 0 else "Madrid, España",
+            "tipo": tipos[i % len(tipos)],
+            "capacidad": 100 + (i % 5) * 50,
+            "fechaCreacion": now.isoformat()
+        })
+    noticias = [{
+        "id": str(uuid.uuid4()),
+        "titulo": f"Noticia de Periodismo {i + 1}",
+        "resumen": "Resumen de la noticia sobre ética periodística internacional.",
+        "contenido": "La Alianza Internacional de Periodismo y Medios Audiovisuales informa sobre nuevas iniciativas.",
+        "categoria": "Ética",
+        "autor": "María González",
+        "fecha": (now - timedelta(days=i)).isoformat(),
+        "fechaCreacion": now.isoformat()
+    } for i in range(30)]
+    miembros = [{
+        "id": str(uuid.uuid4()),
+        "nombre": f"Miembro {i + 1}",
+        "organizacion": "Media Latina Network",
+        "especialidad": "Periodismo Digital",
+        "pais": "España",
+        "tipo": "periodista",
+        "fechaIngreso": (now - timedelta(days=30 * i)).isoformat(),
+        "fechaCreacion": now.isoformat()
+    } for i in range(20)]
+    return {"noticias": noticias, "eventos": eventos, "miembros": miembros, "mensajes": []}
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Minimal PostgREST (Supabase REST) stand-in answering what the API route uses.
+
+    Writes are acknowledged but not stored, so every run sees the same data.
+    """
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle the body waits for a delayed ACK
+    disable_nagle_algorithm = True
+    tables = {}
+    bodies = {}
+    latency = 0.0
+    gate = None
+    counter = None
+    counter_lock = None
+    slot = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _route(self):
+        parts = urlsplit(self.path)
+        return parts.path.rstrip("/").rsplit("/", 1)[-1], parse_qs(parts.query)
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _serve(self, respond):
+        with self.counter_lock:
+            self.counter[self.slot] += 1
+        if self.gate is not None:
+            self.gate.acquire()
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            respond()
+        finally:
+            if self.gate is not None:
+                self.gate.release()
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_HEAD(self):
+        table, _ = self._route()
+        count = len(self.tables.get(table, []))
+        content_range = f"0-{count - 1}/{count}" if count else "*/0"
+        self._serve(lambda: self._send(200, headers={"Content-Range": content_range}))
+
+    def do_GET(self):
+        table, query = self._route()
+        order = query.get("order", [""])[0]
+        key = (table, order)
+        if key not in self.bodies:
+            rows = list(self.tables.get(table, []))
+            if order:
+                column, _, direction = order.partition(".")
+                rows.sort(key=lambda row: row.get(column) or "", reverse=direction.startswith("desc"))
+            self.bodies[key] = json.dumps(rows).encode()
+        self._serve(lambda: self._send(200, self.bodies[key]))
+
+    def do_POST(self):
+        payload = self._read_body()
+        accept = self.headers.get("Accept", "")
+        prefer = self.headers.get("Prefer", "")
+        if "vnd.pgrst.object" in accept:
+            doc = json.loads(payload or b"{}")
+            body = json.dumps(doc[0] if isinstance(doc, list) else doc).encode()
+            self._serve(lambda: self._send(201, body))
+        elif "return=representation" in prefer:
+            doc = json.loads(payload or b"[]")
+            body = json.dumps(doc if isinstance(doc, list) else [doc]).encode()
+            self._serve(lambda: self._send(201, body))
+        else:
+            self._serve(lambda: self._send(201))
+
+    def do_PATCH(self):
+        self._read_body()
+        _, query = self._route()
+        row_id = query.get("id", ["eq."])[0].partition(".")[2]
+        self._serve(lambda: self._send(200, json.dumps([{"id": row_id}]).encode()))
+
+    do_DELETE = do_PATCH
+
+
+class _ReusePortServer(ThreadingHTTPServer):
+    """Threaded HTTP server that lets several processes share one listening port"""
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def server_bind(self):
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+
+def _run_standin(port, slot, counter, tables, latency, max_connections):
+    handler = type("StandInHandler", (_StandInHandler,), {
+        "tables": tables,
+        "bodies": {},
+        "latency": latency,
+        "gate": threading.BoundedSemaphore(max_connections) if max_connections else None,
+        "counter": counter,
+        "counter_lock": threading.Lock(),
+        "slot": slot
+    })
+    _ReusePortServer(("127.0.0.1", port), handler).serve_forever()
+
+
+def _run_proxy(port, upstream_ports, offset):
+    """TCP round-robin proxy: each client connection is pinned to the next instance"""
+    upstreams = itertools.islice(itertools.cycle(upstream_ports), offset, None)
+
+    async def pipe(reader, writer):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle(client_reader, client_writer):
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", next(upstreams))
+        except OSError:
+            client_writer.close()
+            return
+        await asyncio.gather(pipe(client_reader, upstream_writer), pipe(upstream_reader, client_writer))
+
+    async def main():
+        server = await asyncio.start_server(handle, "127.0.0.1", port, backlog=4096, reuse_port=True)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def _run_load(port, path, connections, start_at, measure_from, deadline, results):
+    """Closed-loop load generator: each keep-alive connection sends back-to-back requests"""
+    lock = threading.Lock()
+    totals = {"ok": 0, "errors": 0, "latencies": []}
+
+    def worker():
+        ok, errors, latencies = 0, 0, []
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        while time.time() < start_at:
+            time.sleep(0.01)
+        while True:
+            started = time.time()
+            if started >= deadline:
+                break
+            try:
+                conn.request("GET", path)
+                response = conn.getresponse()
+                response.read()
+                success = response.status == 200
+            except (OSError, http.client.HTTPException):
+                success = False
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            if started < measure_from:
+                continue
+            if success:
+                ok += 1
+                latencies.append(time.time() - started)
+            else:
+                errors += 1
+        conn.close()
+        with lock:
+            totals["ok"] += ok
+            totals["errors"] += errors
+            totals["latencies"].extend(latencies)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put(totals)
+
+
+class AIpmaScalingBenchmark:
+    """Measure how the API scales when adding standalone Next.js instances"""
+
+    def __init__(self, args):
+        self.args = args
+        # CPU pinning needs sched_setaffinity (Linux); elsewhere everything shares the cores
+        self.can_pin = hasattr(os, "sched_getaffinity")
+        available = sorted(os.sched_getaffinity(0)) if self.can_pin else list(range(os.cpu_count() or 1))
+        self.cores = len(available)
+        # The load generator, proxy and stand-in get their own cores so they do not
+        # compete with the instances; with a single core there is nothing to reserve
+        if not self.can_pin:
+            self.shared_reason = "CPU pinning is not supported on this platform"
+            reserved = 0
+        elif self.cores == 1:
+            self.shared_reason = "Only one core available"
+            reserved = 0
+        elif args.harness_cores == 0:
+            self.shared_reason = "No cores reserved (--harness-cores 0)"
+            reserved = 0
+        else:
+            self.shared_reason = None
+            reserved = max(1, self.cores // 4) if args.harness_cores is None else args.harness_cores
+            reserved = min(reserved, self.cores - 1)
+        self.harness_cpus = set(available[:reserved]) or set(available)
+        self.instance_cpus = available[reserved:]
+        self.harness_ceiling = None
+        self.results = []
+        self.standin_processes = []
+        self.standin_port = None
+        self.standin_counter = None
+
+    def instance_counts(self):
+        """1, 2, 4, ... up to the instance cores (their count itself is always included)"""
+        limit = min(self.args.max_instances or len(self.instance_cpus), len(self.instance_cpus))
+        counts, n = [], 1
+        while n < limit:
+            counts.append(n)
+            n *= 2
+        counts.append(limit)
+        return counts
+
+    def start_standin(self):
+        procs = self.args.backend_procs or len(self.harness_cpus)
+        per_process_limit = math.ceil(self.args.backend_max_connections / procs) if self.args.backend_max_connections else 0
+        tables = build_standin_tables(self.args.eventos)
+        self.standin_port = _free_port()
+        self.standin_counter = multiprocessing.Array("q", procs, lock=False)
+        for slot in range(procs):
+            process = multiprocessing.Process(
+                target=_run_standin,
+                args=(self.standin_port, slot, self.standin_counter, tables,
+                      self.args.backend_latency_ms / 1000.0, per_process_limit),
+                daemon=True
+            )
+            process.start()
+            self.standin_processes.append(process)
+        if not _wait_for_port(self.standin_port, "/rest/v1/eventos", timeout=10):
+            raise RuntimeError("Backend stand-in did not start")
+        print(f"🗄️  Backend stand-in on :{self.standin_port} ({procs} process(es), "
+              f"{self.args.backend_latency_ms} ms latency, "
+              f"max connections: {self.args.backend_max_connections or 'unlimited'})")
+
+    def start_instances(self, count):
+        instances = []
+        try:
+            self._spawn_instances(count, instances)
+            for port, process in instances:
+                if not _wait_for_port(port, "/api/", timeout=60, process=process):
+                    raise RuntimeError(f"Next.js instance on :{port} did not become ready")
+        except BaseException:
+            # Node children are not daemons: never leave them behind (failures, Ctrl-C)
+            self.stop_processes([process for _, process in instances])
+            raise
+        return instances
+
+    def _spawn_instances(self, count, instances):
+        for index in range(count):
+            port = _free_port()
+            env = dict(
+                os.environ,
+                PORT=str(port),
+                HOSTNAME="127.0.0.1",
+                NODE_ENV="production",
+                SUPABASE_URL=f"http://127.0.0.1:{self.standin_port}",
+                SUPABASE_SERVICE_ROLE_KEY="benchmark-service-role-key"
+            )
+            core = self.instance_cpus[index % len(self.instance_cpus)]
+            process = subprocess.Popen(
+                ["node", self.args.server],
+                cwd=os.path.dirname(self.args.server),
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                preexec_fn=(lambda core=core: os.sched_setaffinity(0, {core})) if self.can_pin else None
+            )
+            instances.append((port, process))
+
+    def start_proxy(self, upstream_ports, ready_path="/api/"):
+        port = _free_port()
+        procs = self.args.proxy_procs or len(self.harness_cpus)
+        processes = []
+        for offset in range(procs):
+            process = multiprocessing.Process(target=_run_proxy, args=(port, upstream_ports, offset), daemon=True)
+            process.start()
+            processes.append(process)
+        if not _wait_for_port(port, ready_path, timeout=10):
+            self.stop_processes(processes)
+            raise RuntimeError("Round-robin proxy did not start")
+        return port, processes
+
+    @staticmethod
+    def stop_processes(processes):
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            if isinstance(process, subprocess.Popen):
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+            else:
+                process.join(timeout=10)
+
+    def run_load(self, port, concurrency, path=None):
+        """Drive the proxy with a fixed number of keep-alive connections"""
+        load_procs = min(concurrency, self.args.load_procs or max(1, len(self.harness_cpus) // 2))
+        start_at = time.time() + 1.0
+        measure_from = start_at + self.args.warmup
+        deadline = measure_from + self.args.duration
+        queue = multiprocessing.Queue()
+        processes = []
+        for i in range(load_procs):
+            connections = concurrency // load_procs + (1 if i < concurrency % load_procs else 0)
+            process = multiprocessing.Process(
+                target=_run_load,
+                args=(port, path or self.args.path, connections, start_at, measure_from, deadline, queue),
+                daemon=True
+            )
+            process.start()
+            processes.append(process)
+
+        time.sleep(max(0.0, measure_from - time.time()))
+        backend_before = sum(self.standin_counter)
+        time.sleep(max(0.0, deadline - time.time()))
+        backend_after = sum(self.standin_counter)
+
+        ok, errors, latencies = 0, 0, []
+        for _ in processes:
+            totals = queue.get()
+            ok += totals["ok"]
+            errors += totals["errors"]
+            latencies.extend(totals["latencies"])
+        for process in processes:
+            process.join()
+
+        latencies.sort()
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        return {
+            "concurrency": concurrency,
+            "rps": ok / self.args.duration,
+            "errors": errors,
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+            "backend_rps": (backend_after - backend_before) / self.args.duration,
+            "backend_calls_per_request": (backend_after - backend_before) / ok if ok else 0.0
+        }
+
+    def saturate(self, port, concurrency, path=None):
+        """Double the concurrency until throughput stops improving by at least --saturation-gain"""
+        best = None
+        while concurrency <= self.args.max_concurrency:
+            result = self.run_load(port, concurrency, path)
+            print(f"   c={concurrency:<5} {result['rps']:>10.1f} req/s  p50={result['p50_ms']:.1f} ms  "
+                  f"p99={result['p99_ms']:.1f} ms  errors={result['errors']}")
+            if best is not None and result["rps"] < best["rps"] * (1 + self.args.saturation_gain):
+                if result["rps"] > best["rps"]:
+                    best = result
+                break
+            best = result
+            concurrency *= 2
+        return best
+
+    def calibrate(self):
+        """Measure the harness ceiling: load generator -> proxy -> stand-in, with no Node in between"""
+        print("\n🧪 Harness calibration (proxy + stand-in only)")
+        proxy_port, proxy_processes = self.start_proxy([self.standin_port], STANDIN_CALIBRATION_PATH)
+        try:
+            best = self.saturate(proxy_port, self.args.start_concurrency, STANDIN_CALIBRATION_PATH)
+        finally:
+            self.stop_processes(proxy_processes)
+        self.harness_ceiling = best["rps"] if best else None
+        if self.harness_ceiling:
+            print(f"   Harness ceiling: {self.harness_ceiling:.1f} backend calls/s")
+
+    def run(self):
+        """Run the benchmark for every instance count and print the scaling report"""
+        if shutil.which("node") is None:
+            print("❌ node is not installed")
+            return False
+        if not os.path.exists(self.args.server):
+            print(f"❌ Standalone server not found at {self.args.server} - run `yarn build` first")
+            return False
+
+        print("🚀 Starting AIPMA multi-core scaling benchmark...")
+        print(f"📍 Endpoint: {self.args.path}  |  cores: {self.cores}  |  instances: {self.instance_counts()}")
+        if self.shared_reason:
+            print(f"⚠️  {self.shared_reason}: the harness shares cores with the instances")
+        else:
+            print(f"📌 Harness cores: {sorted(self.harness_cpus)}  |  instance cores: {self.instance_cpus}")
+        print("=" * 80)
+
+        # Children started from here (stand-in, proxy, load) inherit the harness cores;
+        # each Node instance is re-pinned to its own core in start_instances
+        if self.can_pin:
+            original_affinity = os.sched_getaffinity(0)
+            os.sched_setaffinity(0, self.harness_cpus)
+        try:
+            self.start_standin()
+            self.calibrate()
+            for count in self.instance_counts():
+                print(f"\n⚙️  {count} instance(s)")
+                instances = self.start_instances(count)
+                try:
+                    proxy_port, proxy_processes = self.start_proxy([port for port, _ in instances])
+                    try:
+                        best = self.saturate(proxy_port, count * self.args.start_concurrency)
+                    finally:
+                        self.stop_processes(proxy_processes)
+                finally:
+                    self.stop_processes([process for _, process in instances])
+                if best is not None:
+                    self.results.append(dict(best, instances=count))
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return False
+        finally:
+            self.stop_processes(self.standin_processes)
+            if self.can_pin:
+                os.sched_setaffinity(0, original_affinity)
+
+        return self.print_report()
+
+    def print_report(self):
+        if not self.results:
+            print("❌ No results collected")
+            return False
+
+        baseline = self.results[0]["rps"] / self.results[0]["instances"]
+        print("\n" + "=" * 80)
+        print("📊 SCALING SUMMARY")
+        print("=" * 80)
+        print(f"{'inst':>4} {'conc':>6} {'req/s':>10} {'req/s/core':>11} {'efficiency':>11} "
+              f"{'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'backend/s':>10} {'calls/req':>10} {'harness':>8}")
+        for result in self.results:
+            per_core = result["rps"] / result["instances"]
+            efficiency = per_core / baseline if baseline else 0.0
+            harness_load = result["backend_rps"] / self.harness_ceiling if self.harness_ceiling else 0.0
+            result["rps_per_core"] = per_core
+            result["efficiency"] = efficiency
+            result["harness_load"] = harness_load
+            result["harness_bound"] = harness_load >= self.args.harness_limit
+            print(f"{result['instances']:>4} {result['concurrency']:>6} {result['rps']:>10.1f} {per_core:>11.1f} "
+                  f"{efficiency * 100:>10.1f}% {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+                  f"{result['errors']:>7} {result['backend_rps']:>10.1f} {result['backend_calls_per_request']:>10.2f} "
+                  f"{harness_load * 100:>6.0f}%{' ⚠️' if result['harness_bound'] else ''}")
+
+        harness_bound = [r for r in self.results if r["harness_bound"]]
+        if harness_bound:
+            print(f"\n⚠️  Backend calls/s reach {self.args.harness_limit * 100:.0f}% of the harness ceiling "
+                  f"({self.harness_ceiling:.1f}/s) at {[r['instances'] for r in harness_bound]} instance(s): "
+                  f"those results are limited by the harness, not the app (raise --harness-cores, "
+                  f"--backend-procs or --proxy-procs).")
+
+        sublinear = [r for r in self.results if r["efficiency"] < self.args.min_efficiency]
+        if sublinear:
+            first = sublinear[0]
+            if self.shared_reason:
+                harness_note = "the load generator/proxy sharing cores with the instances"
+            else:
+                harness_note = (f"the harness saturating its {len(self.harness_cpus)} reserved core(s) "
+                                f"(raise --harness-cores)")
+            print(f"\n⚠️  Scaling drops below {self.args.min_efficiency * 100:.0f}% efficiency at "
+                  f"{first['instances']} instance(s). Look for a shared bottleneck: backend connection "
+                  f"limits, backend latency, or {harness_note}.")
+        else:
+            print(f"\n✅ Scaling stays above {self.args.min_efficiency * 100:.0f}% efficiency up to "
+                  f"{self.results[-1]['instances']} instance(s)")
+
+        if self.args.json:
+            with open(self.args.json, "w") as f:
+                json.dump({
+                    "cores": self.cores,
+                    "harness_cores": sorted(self.harness_cpus),
+                    "harness_ceiling": self.harness_ceiling,
+                    "instance_cores": self.instance_cpus,
+                    "path": self.args.path,
+                    "results": self.results
+                }, f, indent=2)
+            print(f"💾 Results written to {self.args.json}")
+
+        return True
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="AIPMA backend API tests and multi-core scaling benchmark")
+    parser.add_argument("--scaling", action="store_true",
+                        help="run the multi-core scaling benchmark instead of the API tests")
+    parser.add_argument("--server", default=STANDALONE_SERVER, help="path to the standalone server.js")
+    parser.add_argument("--path", default="/api/eventos", help="endpoint to benchmark")
+    parser.add_argument("--max-instances", type=int, default=0,
+                        help="cap on instances (default: cores not reserved for the harness)")
+    parser.add_argument("--harness-cores", type=int, default=None,
+                        help="cores reserved for the load generator, proxy and stand-in (default: cores/4, at least 1)")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per load step")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before each load step")
+    parser.add_argument("--start-concurrency", type=int, default=8, help="initial connections per instance")
+    parser.add_argument("--max-concurrency", type=int, default=2048, help="upper bound on total connections")
+    parser.add_argument("--saturation-gain", type=float, default=0.05,
+                        help="stop ramping once doubling concurrency gains less than this fraction")
+    parser.add_argument("--min-efficiency", type=float, default=0.7,
+                        help="flag instance counts whose scaling efficiency falls below this fraction")
+    parser.add_argument("--harness-limit", type=float, default=0.8,
+                        help="flag steps whose backend calls/s reach this fraction of the calibrated harness ceiling")
+    parser.add_argument("--load-procs", type=int, default=0, help="load generator processes (default: harness cores/2)")
+    parser.add_argument("--proxy-procs", type=int, default=0, help="proxy processes (default: one per harness core)")
+    parser.add_argument("--backend-procs", type=int, default=0, help="backend stand-in processes (default: one per harness core)")
+    parser.add_argument("--backend-latency-ms", type=float, default=2.0,
+                        help="simulated latency of every backend call")
+    parser.add_argument("--backend-max-connections", type=int, default=0,
+                        help="concurrent backend calls allowed, to emulate a Supabase connection limit (0: unlimited)")
+    parser.add_argument("--eventos", type=int, default=120, help="rows in the stand-in eventos table")
+    parser.add_argument("--json", help="write the scaling results to this file")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    tester = AIpmaAPITester()
-    success = tester.run_all_tests()
+    args = parse_args()
+
+    if args.scaling:
+        success = AIpmaScalingBenchmark(args).run()
+    else:
+        tester = AIpmaAPITester()
+        success = tester.run_all_tests()
     
     # Exit with appropriate code
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    sys.exit(0 if success else 1)